@@ -1,33 +1,56 @@
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
+import math
 import os
+import random
+import re
 import sys
 import time
 import traceback
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 from zoneinfo import ZoneInfo
 
+import orjson
 import requests
 from requests import Response, Session
-from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 REPORT_TZ = ZoneInfo("Asia/Shanghai")
 REPORT_TIME_LABEL = "北京时间"
 REQUEST_TIMEOUT_SECONDS = 20
-HISTORY_PATH = Path("data/weekly_history.json")
+HISTORY_PATH = Path("data/weekly_history.jsonl")
+LEGACY_HISTORY_PATH = Path("data/weekly_history.json")
+HISTORY_TAIL_READ_BYTES = 4096
+HISTORY_COMPACT_THRESHOLD_BYTES = 1_000_000
 ENV_PATH = Path(".env")
+CACHE_DIR = Path(".cache")
+CACHE_TTL_SECONDS = 3600
 MAX_HISTORY_ITEMS = 52
+TOP_SYMBOLS_COUNT = 20
 CURRENCY_EYI_DIVISOR = 100_000_000
 
 DEFI_LLAMA_STABLECOINS_URL = "https://stablecoins.llama.fi/stablecoins"
 DEFI_LLAMA_CHART_URL = "https://stablecoins.llama.fi/stablecoincharts/all"
 DUNE_API_BASE_URL = "https://api.dune.com/api/v1"
-DUNE_POLL_INTERVAL_SECONDS = 5
-DUNE_MAX_POLLS = 120
+DUNE_POLL_INITIAL_DELAY_SECONDS = 1.0
+DUNE_POLL_MAX_DELAY_SECONDS = 15.0
+DUNE_POLL_BACKOFF_MULTIPLIER = 1.5
+DUNE_POLL_JITTER_SECONDS = 0.25
+DUNE_POLL_BUDGET_SECONDS = 600.0
 DUNE_RESULT_PAGE_LIMIT = 1000
+DUNE_RESULT_FETCH_WORKERS = 8
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 32
 
 METRIC_SPECS = {
     "total_supply_usd": {
@@ -48,6 +71,23 @@ METRIC_SPECS = {
     },
 }
 
+SUCCESS_METRIC_LINE_TEMPLATE = "**{label}**：{value}  \nWoW：{wow}"
+FAILURE_METRIC_LINE_TEMPLATE = "**{label}**：{value}"
+SUCCESS_CONTENT_TEMPLATE = (
+    f"**统计日期（{REPORT_TIME_LABEL}）**：{{stat_date}}\n\n"
+    f"**统计区间（{REPORT_TIME_LABEL}）**：{{start_date}} 至 {{end_date}}\n\n"
+    "{metric_block}\n\n"
+    "**missing_symbols**：{missing}\n\n"
+    "**数据源**：Supply 来自 DefiLlama；Transfer Volume 来自 Dune"
+)
+FAILURE_CONTENT_TEMPLATE = (
+    f"**执行时间（{REPORT_TIME_LABEL}）**：{{run_time}}\n\n"
+    f"**统计区间（{REPORT_TIME_LABEL}）**：{{window}}\n\n"
+    "**失败原因**：{error}\n\n"
+    "{metric_block}\n\n"
+    "**missing_symbols**：{missing}"
+)
+
 SYMBOL_COLUMN_CANDIDATES = (
     "symbol",
     "token_symbol",
@@ -69,27 +109,112 @@ class WeeklyReportError(RuntimeError):
     """Raised when the weekly report cannot be completed safely."""
 
 
+class FileCache:
+    """File-backed JSON cache keyed by URL, used to skip repeat downloads."""
+
+    def __init__(self, directory: Path, ttl_seconds: float) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    def _entry_path(self, url: str) -> Path:
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{url_hash}.json"
+
+    def fresh(self, url: str) -> bool:
+        entry_path = self._entry_path(url)
+        try:
+            fetched_at = entry_path.stat().st_mtime
+        except OSError:
+            return False
+        return time.time() - fetched_at < self.ttl_seconds
+
+    def load(self, url: str) -> Any:
+        return orjson.loads(self._entry_path(url).read_bytes())
+
+    def save(self, url: str, data: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._entry_path(url).write_bytes(orjson.dumps(data))
+
+
+def get_response_cache() -> FileCache | None:
+    if get_optional_env("ENABLE_CACHE") != "1":
+        return None
+    return FileCache(CACHE_DIR, CACHE_TTL_SECONDS)
+
+
+def fetch_json_with_cache(session: Session, url: str) -> Any:
+    cache = get_response_cache()
+    if cache is not None and cache.fresh(url):
+        log(f"Using cached response for {url}")
+        return cache.load(url)
+
+    payload = request_json(session, "GET", url)
+    if cache is not None:
+        cache.save(url, payload)
+    return payload
+
+
+def build_http_session() -> Session:
+    session = requests.Session()
+    adapter_retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "POST"),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=adapter_retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+# KEY=value with optional single/double quotes; inline comments only apply to
+# unquoted values.
+_DOTENV_RE = re.compile(
+    r"""^[^\S\n]*([A-Za-z_][A-Za-z0-9_]*)[^\S\n]*=[^\S\n]*"""
+    r"""(?:"([^"\n]*)"|'([^'\n]*)'|([^\n#]*?))[^\S\n]*(?:#[^\n]*)?$""",
+    re.MULTILINE,
+)
+
+
 def load_dotenv_file(path: Path) -> None:
     if not path.exists():
         return
 
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if key and key not in os.environ:
-            os.environ[key] = value
+    for match in _DOTENV_RE.finditer(path.read_text(encoding="utf-8")):
+        key = match.group(1)
+        value = match.group(2) or match.group(3) or match.group(4) or ""
+        os.environ.setdefault(key, value)
+
+
+SECRET_ENV_NAMES = ("DUNE_API_KEY", "FEISHU_WEBHOOK_URL")
+
+_sanitize_secrets: list[str] | None = None
+
+
+def refresh_sanitize_cache() -> None:
+    global _sanitize_secrets
+    _sanitize_secrets = [
+        value
+        for value in (os.getenv(name, "").strip() for name in SECRET_ENV_NAMES)
+        if value
+    ]
 
 
 def sanitize_text(text: str) -> str:
+    if _sanitize_secrets is None:
+        refresh_sanitize_cache()
     sanitized = text
-    for secret_name in ("DUNE_API_KEY", "FEISHU_WEBHOOK_URL"):
-        secret_value = os.getenv(secret_name, "").strip()
-        if secret_value:
-            sanitized = sanitized.replace(secret_value, "***")
+    for secret_value in _sanitize_secrets or ():
+        sanitized = sanitized.replace(secret_value, "***")
     return sanitized
 
 
@@ -129,10 +254,13 @@ def get_optional_env(name: str) -> str | None:
     return value or None
 
 
+_INV_CURRENCY_EYI_DIVISOR = 1.0 / CURRENCY_EYI_DIVISOR
+
+
 def format_currency(value: float | None) -> str:
     if value is None:
         return "N/A"
-    return f"{value / CURRENCY_EYI_DIVISOR:,.2f} 亿 USD"
+    return f"{value * _INV_CURRENCY_EYI_DIVISOR:,.2f} 亿 USD"
 
 
 def format_percentage(value: float | None) -> str:
@@ -141,18 +269,24 @@ def format_percentage(value: float | None) -> str:
     return f"{value * 100:.2f}%"
 
 
+def format_missing_symbols(missing_symbols: list[str]) -> str:
+    return ", ".join(missing_symbols) if missing_symbols else "none"
+
+
+_METRIC_ROWS = tuple((name, spec["label"], spec["kind"]) for name, spec in METRIC_SPECS.items())
+_METRIC_KIND = {name: kind for name, _, kind in _METRIC_ROWS}
+_METRIC_FORMATTERS = {"currency": format_currency, "share": format_percentage}
+
+
 def format_metric_value(metric_name: str, value: float | None) -> str:
-    metric_kind = METRIC_SPECS[metric_name]["kind"]
-    if metric_kind == "currency":
-        return format_currency(value)
-    return format_percentage(value)
+    return _METRIC_FORMATTERS[_METRIC_KIND[metric_name]](value)
 
 
 def format_wow(metric_name: str, current: float | None, previous: float | None) -> str:
     if current is None or previous is None:
         return "N/A"
 
-    metric_kind = METRIC_SPECS[metric_name]["kind"]
+    metric_kind = _METRIC_KIND[metric_name]
     if metric_kind == "share":
         delta_pp = (current - previous) * 100
         return f"{delta_pp:+.2f}pp"
@@ -164,21 +298,9 @@ def format_wow(metric_name: str, current: float | None, previous: float | None)
     return f"{change_ratio:+.2%}"
 
 
-def should_retry_request_error(exc: BaseException) -> bool:
-    if isinstance(exc, requests.HTTPError):
-        response = exc.response
-        status_code = response.status_code if response is not None else None
-        return status_code == 429 or (status_code is not None and status_code >= 500)
-    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
-
-
-@retry(
-    reraise=True,
-    retry=retry_if_exception(should_retry_request_error),
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=8),
-)
 def perform_request(session: Session, method: str, url: str, **kwargs: Any) -> Response:
+    # Retries for 429/5xx and connection errors happen inside the mounted
+    # HTTPAdapter (see build_http_session), so no Python-level retry wrapper.
     response = session.request(method, url, timeout=REQUEST_TIMEOUT_SECONDS, **kwargs)
     response.raise_for_status()
     return response
@@ -187,27 +309,32 @@ def perform_request(session: Session, method: str, url: str, **kwargs: Any) -> R
 def request_json(session: Session, method: str, url: str, **kwargs: Any) -> Any:
     response = perform_request(session, method, url, **kwargs)
     try:
-        return response.json()
-    except ValueError as exc:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as exc:
         raise WeeklyReportError(f"Invalid JSON response from {url}") from exc
 
 
-def request_feishu(session: Session, webhook_url: str, payload: dict[str, Any]) -> dict[str, Any]:
+def request_feishu(session: Session, webhook_url: str, payload: dict[str, Any]) -> None:
     response = perform_request(session, "POST", webhook_url, json=payload)
+    # Feishu acknowledges with {"code": 0, ...}; a cheap substring check on the
+    # tiny body skips the JSON parse in the common success case.
+    content = response.content
+    if b'"code":0' in content or b'"code": 0' in content:
+        return
+
     try:
-        data = response.json()
-    except ValueError as exc:
+        data = orjson.loads(content)
+    except orjson.JSONDecodeError as exc:
         raise WeeklyReportError("Feishu webhook returned non-JSON response") from exc
 
     response_code = data.get("code", data.get("StatusCode", 0))
     if response_code not in (0, "0", None):
         message = data.get("msg") or data.get("StatusMessage") or "unknown error"
         raise WeeklyReportError(f"Feishu webhook rejected request: {message}")
-    return data
 
 
 def fetch_defillama_stablecoins(session: Session) -> list[dict[str, Any]]:
-    payload = request_json(session, "GET", DEFI_LLAMA_STABLECOINS_URL)
+    payload = fetch_json_with_cache(session, DEFI_LLAMA_STABLECOINS_URL)
     pegged_assets = payload.get("peggedAssets")
     if not isinstance(pegged_assets, list):
         raise WeeklyReportError("Unexpected DefiLlama stablecoins response structure")
@@ -215,7 +342,7 @@ def fetch_defillama_stablecoins(session: Session) -> list[dict[str, Any]]:
 
 
 def fetch_defillama_total_chart(session: Session) -> list[dict[str, Any]]:
-    payload = request_json(session, "GET", DEFI_LLAMA_CHART_URL)
+    payload = fetch_json_with_cache(session, DEFI_LLAMA_CHART_URL)
     if not isinstance(payload, list) or not payload:
         raise WeeklyReportError("Unexpected DefiLlama chart response structure")
     return payload
@@ -233,39 +360,37 @@ def get_pegged_usd_circulating(asset: dict[str, Any]) -> float:
         return 0.0
 
 
-def build_top20_symbols_and_usdc_supply(pegged_assets: list[dict[str, Any]]) -> tuple[list[str], float]:
-    usd_assets: list[tuple[str, float]] = []
-    usdc_candidates: list[float] = []
-
+def iter_pegged_usd_assets(pegged_assets: list[dict[str, Any]]) -> Iterator[tuple[str, float]]:
+    """Lazily yield (normalized_symbol, circulating) for peggedUSD assets."""
     for asset in pegged_assets:
         if asset.get("pegType") != "peggedUSD":
             continue
         symbol = str(asset.get("symbol") or "").strip()
         if not symbol:
             continue
-        circulating = get_pegged_usd_circulating(asset)
-        usd_assets.append((symbol, circulating))
-        if symbol.upper() == "USDC":
-            usdc_candidates.append(circulating)
+        yield symbol.lower(), get_pegged_usd_circulating(asset)
+
 
-    if not usd_assets:
+def build_top20_symbols_and_usdc_supply(pegged_assets: list[dict[str, Any]]) -> tuple[list[str], float]:
+    # Single pass: dedupe each symbol to its largest circulating supply and
+    # track the USDC maximum on the fly, then pick top-k from the small map.
+    best_by_symbol: dict[str, float] = {}
+    usdc_supply: float | None = None
+
+    for normalized_symbol, circulating in iter_pegged_usd_assets(pegged_assets):
+        if circulating > best_by_symbol.get(normalized_symbol, -1.0):
+            best_by_symbol[normalized_symbol] = circulating
+        if normalized_symbol == "usdc" and (usdc_supply is None or circulating > usdc_supply):
+            usdc_supply = circulating
+
+    if not best_by_symbol:
         raise WeeklyReportError("No peggedUSD assets found in DefiLlama response")
-    if not usdc_candidates:
+    if usdc_supply is None:
         raise WeeklyReportError("USDC supply not found in DefiLlama stablecoins list")
 
-    sorted_assets = sorted(usd_assets, key=lambda item: item[1], reverse=True)
-    top_symbols: list[str] = []
-    seen_symbols: set[str] = set()
-    for symbol, _ in sorted_assets:
-        normalized_symbol = symbol.lower()
-        if normalized_symbol in seen_symbols:
-            continue
-        seen_symbols.add(normalized_symbol)
-        top_symbols.append(normalized_symbol)
-        if len(top_symbols) == 20:
-            break
-
-    return top_symbols, max(usdc_candidates)
+    top_entries = heapq.nlargest(TOP_SYMBOLS_COUNT, best_by_symbol.items(), key=itemgetter(1))
+    top_symbols = [symbol for symbol, _ in top_entries]
+    return top_symbols, usdc_supply
 
 
 def get_total_supply_usd(chart_points: list[dict[str, Any]]) -> float:
@@ -293,7 +418,7 @@ def get_dune_headers(api_key: str) -> dict[str, str]:
 
 def execute_dune_query(
     session: Session,
-    api_key: str,
+    dune_headers: dict[str, str],
     query_id: int,
 ) -> str:
     payload = {
@@ -303,7 +428,7 @@ def execute_dune_query(
         session,
         "POST",
         f"{DUNE_API_BASE_URL}/query/{query_id}/execute",
-        headers=get_dune_headers(api_key),
+        headers=dune_headers,
         json=payload,
     )
     execution_id = response.get("execution_id")
@@ -321,14 +446,16 @@ def format_dune_error(status_payload: dict[str, Any]) -> str:
     return f"Dune query execution failed with state {status_payload.get('state', 'unknown')}"
 
 
-def wait_for_dune_execution(session: Session, api_key: str, execution_id: str) -> dict[str, Any]:
+def wait_for_dune_execution(session: Session, dune_headers: dict[str, str], execution_id: str) -> dict[str, Any]:
     status_url = f"{DUNE_API_BASE_URL}/execution/{execution_id}/status"
-    for attempt in range(DUNE_MAX_POLLS):
+    deadline = time.monotonic() + DUNE_POLL_BUDGET_SECONDS
+    delay = DUNE_POLL_INITIAL_DELAY_SECONDS
+    while True:
         status_payload = request_json(
             session,
             "GET",
             status_url,
-            headers=get_dune_headers(api_key),
+            headers=dune_headers,
         )
         state = str(status_payload.get("state") or "")
         if state in ("QUERY_STATE_COMPLETED", "QUERY_STATE_COMPLETED_PARTIAL"):
@@ -337,116 +464,155 @@ def wait_for_dune_execution(session: Session, api_key: str, execution_id: str) -
             raise WeeklyReportError(format_dune_error(status_payload))
         if status_payload.get("is_execution_finished"):
             raise WeeklyReportError(f"Dune execution finished in unexpected state: {state or 'unknown'}")
-        if attempt < DUNE_MAX_POLLS - 1:
-            time.sleep(DUNE_POLL_INTERVAL_SECONDS)
-    raise WeeklyReportError("Dune query execution timed out while polling for results")
+        if time.monotonic() + delay >= deadline:
+            raise WeeklyReportError("Dune query execution timed out while polling for results")
+        time.sleep(delay + random.uniform(0, DUNE_POLL_JITTER_SECONDS))
+        delay = min(delay * DUNE_POLL_BACKOFF_MULTIPLIER, DUNE_POLL_MAX_DELAY_SECONDS)
+
 
+def fetch_dune_result_page(
+    session: Session,
+    dune_headers: dict[str, str],
+    execution_id: str,
+    offset: int,
+) -> dict[str, Any]:
+    return request_json(
+        session,
+        "GET",
+        f"{DUNE_API_BASE_URL}/execution/{execution_id}/results",
+        headers=dune_headers,
+        params={
+            "offset": offset,
+            "limit": DUNE_RESULT_PAGE_LIMIT,
+            "allow_partial_results": "true",
+        },
+    )
 
-def fetch_dune_result_rows(session: Session, api_key: str, execution_id: str) -> list[dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    offset = 0
-    allow_partial_results = "true"
 
-    while True:
-        result_payload = request_json(
-            session,
-            "GET",
-            f"{DUNE_API_BASE_URL}/execution/{execution_id}/results",
-            headers=get_dune_headers(api_key),
-            params={
-                "offset": offset,
-                "limit": DUNE_RESULT_PAGE_LIMIT,
-                "allow_partial_results": allow_partial_results,
-            },
-        )
-        result = result_payload.get("result")
-        if not isinstance(result, dict):
-            raise WeeklyReportError("Dune result payload is missing result rows")
+def extract_dune_page_rows(result_payload: dict[str, Any]) -> list[dict[str, Any]]:
+    result = result_payload.get("result")
+    if not isinstance(result, dict):
+        raise WeeklyReportError("Dune result payload is missing result rows")
 
-        page_rows = result.get("rows")
-        if not isinstance(page_rows, list):
-            raise WeeklyReportError("Dune result payload has invalid rows structure")
+    page_rows = result.get("rows")
+    if not isinstance(page_rows, list):
+        raise WeeklyReportError("Dune result payload has invalid rows structure")
+    return [row for row in page_rows if isinstance(row, dict)]
 
-        for row in page_rows:
-            if isinstance(row, dict):
-                rows.append(row)
 
-        next_offset = result_payload.get("next_offset")
-        if next_offset is None:
-            break
-        offset = int(next_offset)
+def get_dune_total_row_count(result_payload: dict[str, Any]) -> int | None:
+    result = result_payload.get("result")
+    if not isinstance(result, dict):
+        return None
+    metadata = result.get("metadata")
+    if not isinstance(metadata, dict):
+        return None
+    total_row_count = metadata.get("total_row_count")
+    if isinstance(total_row_count, int) and total_row_count >= 0:
+        return total_row_count
+    return None
+
+
+def fetch_dune_result_rows(session: Session, dune_headers: dict[str, str], execution_id: str) -> list[dict[str, Any]]:
+    first_payload = fetch_dune_result_page(session, dune_headers, execution_id, offset=0)
+    rows = extract_dune_page_rows(first_payload)
+
+    total_row_count = get_dune_total_row_count(first_payload)
+    if total_row_count is not None:
+        remaining_offsets = range(DUNE_RESULT_PAGE_LIMIT, total_row_count, DUNE_RESULT_PAGE_LIMIT)
+        if remaining_offsets:
+            with ThreadPoolExecutor(max_workers=DUNE_RESULT_FETCH_WORKERS) as executor:
+                page_payloads = executor.map(
+                    lambda offset: fetch_dune_result_page(session, dune_headers, execution_id, offset),
+                    remaining_offsets,
+                )
+                for page_payload in page_payloads:
+                    rows.extend(extract_dune_page_rows(page_payload))
+    else:
+        next_offset = first_payload.get("next_offset")
+        while next_offset is not None:
+            result_payload = fetch_dune_result_page(session, dune_headers, execution_id, int(next_offset))
+            rows.extend(extract_dune_page_rows(result_payload))
+            next_offset = result_payload.get("next_offset")
 
     if not rows:
         raise WeeklyReportError("Dune query returned no rows")
     return rows
 
 
-def get_row_value(row: dict[str, Any], candidates: tuple[str, ...]) -> Any:
-    lowered_row = {str(key).lower(): value for key, value in row.items()}
+def resolve_row_column(sample_row: dict[str, Any], candidates: tuple[str, ...]) -> str | None:
+    lowered_keys = {str(key).lower(): key for key in sample_row}
     for candidate in candidates:
-        if candidate in lowered_row:
-            return lowered_row[candidate]
+        if candidate in lowered_keys:
+            return lowered_keys[candidate]
     return None
 
 
 def extract_dune_symbol_totals(rows: list[dict[str, Any]]) -> dict[str, float]:
-    totals: dict[str, float] = {}
-    for row in rows:
-        raw_symbol = get_row_value(row, SYMBOL_COLUMN_CANDIDATES)
-        if raw_symbol is None:
-            continue
-        symbol = str(raw_symbol).strip().lower()
-        if not symbol:
-            continue
-
-        raw_volume = get_row_value(row, VOLUME_COLUMN_CANDIDATES)
-        if raw_volume is None:
-            continue
-        try:
-            volume = float(raw_volume)
-        except (TypeError, ValueError):
-            continue
-        totals[symbol] = totals.get(symbol, 0.0) + volume
+    totals: defaultdict[str, float] = defaultdict(float)
+    symbol_key = resolve_row_column(rows[0], SYMBOL_COLUMN_CANDIDATES) if rows else None
+    volume_key = resolve_row_column(rows[0], VOLUME_COLUMN_CANDIDATES) if rows else None
+
+    if symbol_key is not None and volume_key is not None:
+        for row in rows:
+            raw_symbol = row.get(symbol_key)
+            if raw_symbol is None:
+                continue
+            symbol = str(raw_symbol).strip().lower()
+            if not symbol:
+                continue
+
+            raw_volume = row.get(volume_key)
+            if raw_volume is None:
+                continue
+            try:
+                volume = float(raw_volume)
+            except (TypeError, ValueError):
+                continue
+            totals[symbol] += volume
 
     if not totals:
         raise WeeklyReportError(
             "Dune query rows did not contain usable symbol and volume columns. "
             "Expected columns like symbol + volume_7d_usd."
         )
-    return totals
+    return dict(totals)
 
 
-def compute_dune_share(dune_symbol_totals: dict[str, float], symbols: list[str]) -> tuple[float | None, list[str], dict[str, float]]:
+def compute_dune_share(dune_symbol_totals: dict[str, float], symbols: list[str]) -> tuple[float | None, list[str]]:
     missing_symbols: list[str] = []
-    denominator_totals: dict[str, float] = {}
+    denominator_values: list[float] = []
+    usdc_total: float | None = None
 
     for symbol in symbols:
-        if symbol not in dune_symbol_totals:
+        value = dune_symbol_totals.get(symbol)
+        if value is None:
             missing_symbols.append(symbol)
             continue
-        denominator_totals[symbol] = dune_symbol_totals[symbol]
+        denominator_values.append(value)
+        if symbol == "usdc":
+            usdc_total = value
 
-    usdc_total = denominator_totals.get("usdc")
     if usdc_total is None:
-        return None, missing_symbols, denominator_totals
+        return None, missing_symbols
 
-    denominator = sum(denominator_totals.values())
+    denominator = math.fsum(denominator_values)
     if denominator <= 0:
         raise WeeklyReportError("Dune denominator volume is zero")
-    return usdc_total / denominator, missing_symbols, denominator_totals
+    return usdc_total / denominator, missing_symbols
 
 
 def load_history(path: Path) -> list[dict[str, Any]]:
     if not path.exists():
         return []
 
-    raw_text = path.read_text(encoding="utf-8").strip()
-    if not raw_text:
+    raw_bytes = path.read_bytes()
+    if not raw_bytes.strip():
         return []
 
     try:
-        data = json.loads(raw_text)
-    except json.JSONDecodeError as exc:
+        data = orjson.loads(raw_bytes)
+    except orjson.JSONDecodeError as exc:
         raise WeeklyReportError(f"Invalid JSON in {path}") from exc
 
     if not isinstance(data, list):
@@ -454,19 +620,58 @@ def load_history(path: Path) -> list[dict[str, Any]]:
     return [item for item in data if isinstance(item, dict)]
 
 
-def save_history(path: Path, history: list[dict[str, Any]]) -> None:
+def read_last_history_entry(path: Path) -> dict[str, Any] | None:
+    if not path.exists():
+        legacy_history = load_history(LEGACY_HISTORY_PATH)
+        return legacy_history[-1] if legacy_history else None
+
+    with path.open("rb") as handle:
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        window = HISTORY_TAIL_READ_BYTES
+        while True:
+            handle.seek(max(0, size - window))
+            tail = handle.read()
+            # The window start may land mid-line; lines are only trustworthy
+            # once the window covers the whole file or contains a newline
+            # ahead of the last entry.
+            if window >= size or b"\n" in tail.rstrip(b"\n"):
+                break
+            window *= 2
+
+    tail_lines = tail.splitlines()
+    if window < size:
+        tail_lines = tail_lines[1:]
+    for raw_line in reversed(tail_lines):
+        line = raw_line.strip()
+        if not line:
+            continue
+        try:
+            entry = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            raise WeeklyReportError(f"Invalid JSON line in {path}") from exc
+        return entry if isinstance(entry, dict) else None
+    return None
+
+
+def compact_history(path: Path) -> None:
+    if path.stat().st_size <= HISTORY_COMPACT_THRESHOLD_BYTES:
+        return
+    lines = [line for line in path.read_bytes().splitlines() if line.strip()]
+    path.write_bytes(b"\n".join(lines[-MAX_HISTORY_ITEMS:]) + b"\n")
+
+
+def append_history_entry(path: Path, entry: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    trimmed_history = history[-MAX_HISTORY_ITEMS:]
-    path.write_text(
-        json.dumps(trimmed_history, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+    with path.open("ab") as handle:
+        handle.write(orjson.dumps(entry) + b"\n")
+    compact_history(path)
 
 
-def get_previous_metrics(history: list[dict[str, Any]]) -> dict[str, float] | None:
-    if not history:
+def get_previous_metrics(last_entry: dict[str, Any] | None) -> dict[str, Any] | None:
+    if not last_entry:
         return None
-    metrics = history[-1].get("metrics")
+    metrics = last_entry.get("metrics")
     if not isinstance(metrics, dict):
         return None
     return metrics
@@ -474,7 +679,7 @@ def get_previous_metrics(history: list[dict[str, Any]]) -> dict[str, float] | No
 
 def build_wow_map(current_metrics: dict[str, float | None], previous_metrics: dict[str, Any] | None) -> dict[str, str]:
     wow_map: dict[str, str] = {}
-    for metric_name in METRIC_SPECS:
+    for metric_name, _, _ in _METRIC_ROWS:
         previous_value = None
         if isinstance(previous_metrics, dict):
             raw_previous = previous_metrics.get(metric_name)
@@ -511,21 +716,24 @@ def build_success_card_payload(
     wow_map: dict[str, str],
     missing_symbols: list[str],
 ) -> dict[str, Any]:
-    metric_lines = []
-    for metric_name, spec in METRIC_SPECS.items():
-        metric_lines.append(
-            f"**{spec['label']}**：{format_metric_value(metric_name, metrics.get(metric_name))}  \n"
-            f"WoW：{wow_map[metric_name]}"
+    metric_block = "\n\n".join(
+        SUCCESS_METRIC_LINE_TEMPLATE.format_map(
+            {
+                "label": label,
+                "value": format_metric_value(metric_name, metrics.get(metric_name)),
+                "wow": wow_map[metric_name],
+            }
         )
-
-    content = "\n\n".join(
-        [
-            f"**统计日期（{REPORT_TIME_LABEL}）**：{run_time_report_tz.date().isoformat()}",
-            f"**统计区间（{REPORT_TIME_LABEL}）**：{start_date.isoformat()} 至 {end_date.isoformat()}",
-            *metric_lines,
-            f"**missing_symbols**：{', '.join(missing_symbols) if missing_symbols else 'none'}",
-            "**数据源**：Supply 来自 DefiLlama；Transfer Volume 来自 Dune",
-        ]
+        for metric_name, label, _ in _METRIC_ROWS
+    )
+    content = SUCCESS_CONTENT_TEMPLATE.format_map(
+        {
+            "stat_date": run_time_report_tz.date().isoformat(),
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "metric_block": metric_block,
+            "missing": format_missing_symbols(missing_symbols),
+        }
     )
 
     return {
@@ -557,24 +765,28 @@ def build_failure_card_payload(
     end_date: date | None,
     missing_symbols: list[str],
 ) -> dict[str, Any]:
-    metric_lines = []
-    for metric_name, spec in METRIC_SPECS.items():
-        metric_lines.append(
-            f"**{spec['label']}**：{format_metric_value(metric_name, partial_metrics.get(metric_name))}"
+    metric_block = "\n\n".join(
+        FAILURE_METRIC_LINE_TEMPLATE.format_map(
+            {
+                "label": label,
+                "value": format_metric_value(metric_name, partial_metrics.get(metric_name)),
+            }
         )
+        for metric_name, label, _ in _METRIC_ROWS
+    )
 
     window_text = "N/A"
     if start_date and end_date:
         window_text = f"{start_date.isoformat()} 至 {end_date.isoformat()}"
 
-    content = "\n\n".join(
-        [
-            f"**执行时间（{REPORT_TIME_LABEL}）**：{run_time_report_tz.isoformat(timespec='seconds')}",
-            f"**统计区间（{REPORT_TIME_LABEL}）**：{window_text}",
-            f"**失败原因**：{error_message}",
-            *metric_lines,
-            f"**missing_symbols**：{', '.join(missing_symbols) if missing_symbols else 'none'}",
-        ]
+    content = FAILURE_CONTENT_TEMPLATE.format_map(
+        {
+            "run_time": run_time_report_tz.isoformat(timespec="seconds"),
+            "window": window_text,
+            "error": error_message,
+            "metric_block": metric_block,
+            "missing": format_missing_symbols(missing_symbols),
+        }
     )
 
     return {
@@ -645,11 +857,11 @@ def notify_failure(
         text_lines.append(
             f"统计区间（{REPORT_TIME_LABEL}）：{start_date.isoformat()} 至 {end_date.isoformat()}"
         )
-    for metric_name, spec in METRIC_SPECS.items():
+    for metric_name, label, _ in _METRIC_ROWS:
         text_lines.append(
-            f"{spec['label']}：{format_metric_value(metric_name, partial_metrics.get(metric_name))}"
+            f"{label}：{format_metric_value(metric_name, partial_metrics.get(metric_name))}"
         )
-    text_lines.append(f"missing_symbols：{', '.join(missing_symbols) if missing_symbols else 'none'}")
+    text_lines.append(f"missing_symbols：{format_missing_symbols(missing_symbols)}")
     send_feishu_message(session, webhook_url, card_payload, "\n".join(text_lines))
 
 
@@ -667,21 +879,30 @@ def run_report() -> int:
     end_date: date | None = None
     webhook_url = get_optional_env("FEISHU_WEBHOOK_URL")
 
-    with requests.Session() as session:
+    with build_http_session() as session:
         try:
-            dune_api_key = get_required_env("DUNE_API_KEY")
+            dune_headers = get_dune_headers(get_required_env("DUNE_API_KEY"))
             dune_query_id = int(get_required_env("DUNE_QUERY_ID"))
             webhook_url = get_required_env("FEISHU_WEBHOOK_URL")
+            start_date, end_date = get_report_window(run_time_report_tz)
 
             log(
                 f"Starting report for {run_time_report_tz.date().isoformat()} "
                 f"({REPORT_TIME_LABEL})"
             )
-            log("Fetching DefiLlama stablecoin list")
-            pegged_assets = fetch_defillama_stablecoins(session)
-
-            log("Fetching DefiLlama total supply chart")
-            chart_points = fetch_defillama_total_chart(session)
+            log("Fetching DefiLlama data and starting Dune execution concurrently")
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                pegged_assets_future = executor.submit(fetch_defillama_stablecoins, session)
+                chart_points_future = executor.submit(fetch_defillama_total_chart, session)
+                execution_id_future = executor.submit(
+                    execute_dune_query,
+                    session,
+                    dune_headers,
+                    dune_query_id,
+                )
+                pegged_assets = pegged_assets_future.result()
+                chart_points = chart_points_future.result()
+                execution_id = execution_id_future.result()
 
             top_symbols, usdc_supply_usd = build_top20_symbols_and_usdc_supply(pegged_assets)
             total_supply_usd = get_total_supply_usd(chart_points)
@@ -690,26 +911,18 @@ def run_report() -> int:
             partial_metrics["usdc_supply_usd"] = usdc_supply_usd
             partial_metrics["usdc_supply_share"] = usdc_supply_usd / total_supply_usd
 
-            start_date, end_date = get_report_window(run_time_report_tz)
-
-            log("Executing Dune query for transfer volume share")
-            execution_id = execute_dune_query(
-                session,
-                dune_api_key,
-                dune_query_id,
-            )
-            wait_for_dune_execution(session, dune_api_key, execution_id)
-            dune_rows = fetch_dune_result_rows(session, dune_api_key, execution_id)
+            log("Waiting for Dune query execution")
+            wait_for_dune_execution(session, dune_headers, execution_id)
+            dune_rows = fetch_dune_result_rows(session, dune_headers, execution_id)
             dune_symbol_totals = extract_dune_symbol_totals(dune_rows)
 
-            volume_share, missing_symbols, _ = compute_dune_share(dune_symbol_totals, top_symbols)
+            volume_share, missing_symbols = compute_dune_share(dune_symbol_totals, top_symbols)
             partial_metrics["usdc_transfer_volume_share_7d"] = volume_share
 
             if volume_share is None:
                 raise WeeklyReportError("Dune query result did not include usable USDC transfer volume data")
 
-            history = load_history(HISTORY_PATH)
-            previous_metrics = get_previous_metrics(history)
+            previous_metrics = get_previous_metrics(read_last_history_entry(HISTORY_PATH))
             wow_map = build_wow_map(partial_metrics, previous_metrics)
 
             entry = build_history_entry(
@@ -719,8 +932,7 @@ def run_report() -> int:
                 metrics=partial_metrics,
                 missing_symbols=missing_symbols,
             )
-            history.append(entry)
-            save_history(HISTORY_PATH, history)
+            append_history_entry(HISTORY_PATH, entry)
 
             card_payload = build_success_card_payload(
                 run_time_report_tz=run_time_report_tz,
@@ -735,11 +947,11 @@ def run_report() -> int:
                 f"统计日期（{REPORT_TIME_LABEL}）：{run_time_report_tz.date().isoformat()}",
                 f"统计区间（{REPORT_TIME_LABEL}）：{start_date.isoformat()} 至 {end_date.isoformat()}",
             ]
-            for metric_name, spec in METRIC_SPECS.items():
+            for metric_name, label, _ in _METRIC_ROWS:
                 text_lines.append(
-                    f"{spec['label']}：{format_metric_value(metric_name, partial_metrics.get(metric_name))} | WoW {wow_map[metric_name]}"
+                    f"{label}：{format_metric_value(metric_name, partial_metrics.get(metric_name))} | WoW {wow_map[metric_name]}"
                 )
-            text_lines.append(f"missing_symbols：{', '.join(missing_symbols) if missing_symbols else 'none'}")
+            text_lines.append(f"missing_symbols：{format_missing_symbols(missing_symbols)}")
             text_lines.append("数据源：Supply 来自 DefiLlama；Transfer Volume 来自 Dune")
             send_feishu_message(session, webhook_url, card_payload, "\n".join(text_lines))
 
@@ -750,7 +962,7 @@ def run_report() -> int:
             log(f"Weekly report failed: {error_message}")
             log(traceback.format_exc())
             log(f"Partial metrics snapshot: {json.dumps(partial_metrics, ensure_ascii=False)}")
-            log(f"Missing symbols snapshot: {', '.join(missing_symbols) if missing_symbols else 'none'}")
+            log(f"Missing symbols snapshot: {format_missing_symbols(missing_symbols)}")
             try:
                 notify_failure(
                     session=session,
@@ -770,6 +982,7 @@ def run_report() -> int:
 
 def main() -> None:
     load_dotenv_file(ENV_PATH)
+    refresh_sanitize_cache()
     sys.exit(run_report())
 
 